@@ -1,27 +1,252 @@
 import os
 import hashlib
 import zipfile
-import pathlib
-from concurrent.futures import ThreadPoolExecutor
-import tkinter as tk
-from tkinter import filedialog
+import mmap
+import struct
+import zlib
+import sqlite3
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import io
-from typing import Dict, Set, List, Tuple
+from typing import Dict, Set, List, Tuple, Optional, Iterator
 import logging
-from tqdm import tqdm
 import signal
 import sys
-from datetime import datetime
+import threading
+import argparse
+from collections import defaultdict
+from functools import partial
+import time
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+SINGLE_SHOT_LIMIT = 64 << 20  # Files below this are hashed in one call
+LARGE_BLOCK_SIZE = 4 << 20  # Block size for files too large to map
+ARCHIVE_READ_BUDGET = 256 << 20  # Decompressed bytes all archive workers may hold at once
+BLAKE3_THREADED_MIN = 1 << 20  # Files above this let BLAKE3 use several threads
+DEFAULT_HASH_ALGORITHM = "blake3" if blake3 is not None else "sha256"
+
+# Constructors resolved once instead of through a module attribute per file
+_sha256 = hashlib.sha256
+_blake3 = blake3.blake3 if blake3 is not None else None
+AUTO_THREADS = _blake3.AUTO if _blake3 is not None else -1  # One BLAKE3 thread per core
+
+def _new_hasher(algorithm: str, size: int, max_threads: int = 1):
+    """Create a hash object suited to content of the given size.
+    
+    max_threads only affects BLAKE3. Pass AUTO_THREADS only where a single
+    caller is hashing alone in its process; the default of 1 keeps pool
+    workers from each starting a thread per core.
+    """
+    if algorithm == "blake3":
+        # BLAKE3's tree structure lets one large input be hashed across cores
+        return _blake3(max_threads=max_threads if size > BLAKE3_THREADED_MIN else 1)
+    return _sha256()
+
+def _iter_file_buffers(f, file_size: int) -> Iterator:
+    """Yield the contents of a file opened unbuffered as a series of buffers.
+    
+    Files below SINGLE_SHOT_LIMIT come back as one memory map, so the
+    consumer sees a single buffer. Larger files come back as memoryview
+    slices of one reused buffer, each valid only until the next is requested.
+    """
+    if file_size and file_size < SINGLE_SHOT_LIMIT:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+    elif file_size:
+        # Refill one preallocated buffer instead of allocating per read
+        readinto = f.readinto
+        buffer = bytearray(LARGE_BLOCK_SIZE)
+        view = memoryview(buffer)
+        while True:
+            read_size = readinto(buffer)
+            if not read_size:
+                break
+            yield view[:read_size]
+
+def _hash_file(file_path: str, algorithm: str = DEFAULT_HASH_ALGORITHM,
+               max_threads: int = 1) -> Tuple[str, Optional[str], int]:
+    """Return (path, hex digest, size) for a file.
+    
+    Kept at module level so it can be pickled into worker processes. The
+    digest is None if the file could not be read.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        hasher = _new_hasher(algorithm, file_size, max_threads)
+        # Unbuffered: every path below reads in large blocks or maps the file
+        with open(file_path, "rb", buffering=0) as f:
+            if file_size >= SINGLE_SHOT_LIMIT and hasattr(hasher, "update_mmap"):
+                # BLAKE3 maps large files itself, using up to max_threads threads
+                hasher.update_mmap(file_path)
+            elif file_size >= SINGLE_SHOT_LIMIT and hasattr(hashlib, "file_digest"):
+                hashlib.file_digest(f, lambda: hasher)
+            else:
+                update = hasher.update
+                for buffer in _iter_file_buffers(f, file_size):
+                    update(buffer)
+    except (PermissionError, OSError) as e:
+        logging.error(f"Error processing {file_path}: {e}")
+        return file_path, None, 0
+    return file_path, hasher.hexdigest(), file_size
+
+def _crc_file(file_path: str) -> Tuple[str, Optional[int], int]:
+    """Return (path, CRC32, size) for a file.
+    
+    Zip members carry the CRC32 of their contents in the central directory,
+    so matching against it rules out most non-duplicates before any
+    decompression or hashing. The CRC is None if the file could not be read.
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        crc = 0
+        with open(file_path, "rb", buffering=0) as f:
+            for buffer in _iter_file_buffers(f, file_size):
+                crc = zlib.crc32(buffer, crc)
+    except (PermissionError, OSError) as e:
+        logging.error(f"Error processing {file_path}: {e}")
+        return file_path, None, 0
+    return file_path, crc, file_size
+
+def _walk_files(root: str) -> Iterator[os.DirEntry]:
+    """Yield a DirEntry for every regular file under root.
+    
+    os.scandir hands back type and stat information with the directory
+    listing, so no separate is_file()/stat() round trip is needed per entry
+    and no Path object is built for it. Symlinks are not followed.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except (PermissionError, OSError) as e:
+                        logging.warning(f"Could not access {entry.path}: {e}")
+        except (PermissionError, OSError) as e:
+            logging.warning(f"Could not access {directory}: {e}")
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "archive_inspector", "hashes.sqlite")
+
+class HashCache:
+    """Persistent CRC32 and content hashes for folder files.
+    
+    Rows are keyed by absolute path and only trusted while the file's
+    mtime and size are unchanged, so repeat scans of an unchanged folder
+    need no reads at all.
+    """
+    
+    DIGEST_COLUMNS = ("sha256", "blake3")
+    COMMIT_EVERY = 1000  # Writes batched per transaction
+    
+    def __init__(self, cache_path: str):
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.connection = sqlite3.connect(cache_path)
+        try:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                "path TEXT PRIMARY KEY, mtime INTEGER, size INTEGER, "
+                "crc32 INTEGER, sha256 TEXT, blake3 TEXT)"
+            )
+            self.connection.commit()
+        except sqlite3.Error:
+            self.connection.close()
+            raise
+        self.pending_writes = 0
+    
+    def get(self, path: str, mtime_ns: int, size: int) -> Optional[Dict[str, object]]:
+        """Return the cached row for a file, or None if missing or stale"""
+        row = self.connection.execute(
+            "SELECT crc32, sha256, blake3 FROM hashes WHERE path = ? AND mtime = ? AND size = ?",
+            (path, mtime_ns, size)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("crc32",) + self.DIGEST_COLUMNS, row))
+    
+    def put_crc(self, path: str, mtime_ns: int, size: int, crc: int) -> None:
+        """Store a file's CRC32, dropping any digests from an older version"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO hashes (path, mtime, size, crc32) VALUES (?, ?, ?, ?)",
+            (path, mtime_ns, size, crc)
+        )
+        self.note_write()
+    
+    def put_digest(self, path: str, mtime_ns: int, size: int, algorithm: str, digest: str) -> None:
+        """Store a content hash for a file whose CRC32 row is already cached"""
+        if algorithm not in self.DIGEST_COLUMNS:
+            raise ValueError(f"Unsupported hash algorithm: {algorithm}")
+        self.connection.execute(
+            f"UPDATE hashes SET {algorithm} = ? WHERE path = ? AND mtime = ? AND size = ?",
+            (digest, path, mtime_ns, size)
+        )
+        self.note_write()
+    
+    def note_write(self) -> None:
+        """Commit once every COMMIT_EVERY writes"""
+        self.pending_writes += 1
+        if self.pending_writes >= self.COMMIT_EVERY:
+            self.commit()
+    
+    def commit(self) -> None:
+        """Commit outstanding writes, releasing the database write lock"""
+        self.connection.commit()
+        self.pending_writes = 0
+    
+    def close(self) -> None:
+        """Commit outstanding writes and close the database"""
+        try:
+            self.commit()
+        finally:
+            self.connection.close()
 
 class ArchiveComparer:
-    def __init__(self):
+    def __init__(self, hash_algorithm: str = DEFAULT_HASH_ALGORITHM, cache_path: Optional[str] = None):
+        self.hash_algorithm = hash_algorithm  # "blake3" or "sha256"
+        self.hash_cache = None
+        if cache_path is not None:
+            try:
+                self.hash_cache = HashCache(cache_path)
+            except (sqlite3.Error, OSError) as e:
+                logging.warning(f"Could not open hash cache {cache_path}: {e}")
         self.folder_files: Dict[str, str] = {}  # path: hash
         self.archive_files: Dict[str, str] = {}  # path: hash
-        self.chunk_size = 8192  # Optimal chunk size for reading files
+        self.folder_hashes_by_hash: Dict[str, List[str]] = defaultdict(list)  # hash: paths
+        self.folder_sizes: Dict[str, int] = {}  # path: size
+        self.folder_crcs: Dict[str, int] = {}  # path: CRC32, for size-matched files
+        self.folder_mtimes: Dict[str, int] = {}  # path: st_mtime_ns
+        self.archive_sizes: Dict[str, int] = {}  # path: size
+        self.archive_members: Dict[str, zipfile.ZipInfo] = {}  # path: info
+        # Block size for streamed reads. SHA-256 throughput in OpenSSL levels off
+        # once blocks reach the tens of KiB; 1 MiB sits well past that plateau,
+        # so what remains is saving Python round trips. ZipExtFile.read(n)
+        # caps its internal reads, so large blocks are safe there too.
+        self.chunk_size = 1 << 20
+        # Compressed members below this are read whole; scan_archive lowers it
+        # so that all workers together stay within ARCHIVE_READ_BUDGET
+        self.member_read_limit = SINGLE_SHOT_LIMIT
         self.current_file = ""
         self.total_bytes_processed = 0
         self.total_bytes = 0
-        self.start_time = None
+        self.folder_size = 0
+        self.archive_size = None
+        self.start_time = None  # time.monotonic() when scanning began
+        self.progress_lock = threading.Lock()
+        self.progress_interval = 0.1  # Seconds between progress bar refreshes
+        self.progress_bar = None
+        self.progress_stop = None
+        self.progress_thread = None
+        self.archive_map = None  # Read-only map of the archive during scan_archive
         
     def format_size(self, size):
         """Convert bytes to human readable format"""
@@ -37,116 +262,403 @@ class ArchiveComparer:
         seconds = seconds % 60
         return f"{int(hours)}h {int(minutes)}m {int(seconds)}s"
     
+    def add_progress(self, num_bytes: int) -> None:
+        """Record processed bytes; safe to call from any thread"""
+        with self.progress_lock:
+            self.total_bytes_processed += num_bytes
+    
     def update_progress(self):
-        """Update the progress display"""
-        if self.start_time is None:
+        """Sync the progress bar with the shared byte counter"""
+        if self.progress_bar is None:
             return
         
-        elapsed_time = datetime.now() - self.start_time
-        elapsed_seconds = elapsed_time.total_seconds()
+        with self.progress_lock:
+            processed = self.total_bytes_processed
         
-        if self.total_bytes_processed > 0:
-            progress = (self.total_bytes_processed / self.total_bytes) * 100
-            speed = self.total_bytes_processed / elapsed_seconds
-            remaining_bytes = self.total_bytes - self.total_bytes_processed
-            eta = remaining_bytes / speed if speed > 0 else 0
-            
-            # Clear the line and update progress
-            print(f"\r{' ' * 100}", end='')
-            print(f"\rProcessing: {self.current_file[:50]}..." if len(self.current_file) > 50 else f"\rProcessing: {self.current_file}")
-            print(f"Progress: {progress:.2f}% | "
-                  f"Speed: {self.format_size(speed)}/s | "
-                  f"Processed: {self.format_size(self.total_bytes_processed)} / {self.format_size(self.total_bytes)} | "
-                  f"ETA: {self.format_time(eta)}", end='\r')
-    
-    def get_total_folder_size(self, folder_path: str) -> int:
-        """Calculate total size of all files in folder"""
-        total_size = 0
+        self.progress_bar.update(processed - self.progress_bar.n)
+        self.progress_bar.set_postfix_str(
+            f"{self.current_file[:50]}..." if len(self.current_file) > 50 else self.current_file,
+            refresh=False
+        )
+    
+    def start_progress(self):
+        """Start a progress bar refreshed by a background thread at 10 Hz"""
+        from tqdm import tqdm  # Imported here so spawned hash workers never load it
+        self.progress_bar = tqdm(total=self.total_bytes, initial=self.total_bytes_processed,
+                                 unit='B', unit_scale=True, unit_divisor=1024)
+        self.progress_stop = threading.Event()
+        
+        def refresh():
+            while not self.progress_stop.wait(self.progress_interval):
+                self.update_progress()
+        
+        self.progress_thread = threading.Thread(target=refresh, daemon=True)
+        self.progress_thread.start()
+    
+    def grow_progress_total(self, num_bytes: int) -> None:
+        """Add work discovered mid-scan to the total and the running progress bar"""
+        self.total_bytes += num_bytes
+        if self.progress_bar is not None:
+            self.progress_bar.total = self.total_bytes
+    
+    def stop_progress(self):
+        """Stop the refresh thread and close the progress bar"""
+        if self.progress_bar is None:
+            return
+        
+        self.progress_stop.set()
+        self.progress_thread.join()
+        self.update_progress()
+        self.progress_bar.close()
+        self.progress_bar = None
+    
+    def get_archive_size(self, zip_file: zipfile.ZipFile) -> int:
+        """Calculate total uncompressed size of archive, cached after the first call.
+        
+        Also records each member's ZipInfo and size in archive_members and
+        archive_sizes, read from the already parsed central directory.
+        """
+        if self.archive_size is not None:
+            return self.archive_size
         try:
-            for path in pathlib.Path(folder_path).rglob('*'):
-                try:
-                    if path.is_file():
-                        total_size += path.stat().st_size
-                except (PermissionError, OSError) as e:
-                    logging.warning(f"Could not access {path}: {e}")
+            self.archive_members = {
+                info.filename: info
+                for info in zip_file.filelist if not info.is_dir()
+            }
+            self.archive_sizes = {
+                filename: info.file_size for filename, info in self.archive_members.items()
+            }
+            self.archive_size = sum(self.archive_sizes.values())
+            return self.archive_size
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             sys.exit(0)
-        return total_size
-
-    def get_archive_size(self, archive_path: str) -> int:
-        """Calculate total uncompressed size of archive"""
+        
+    def cached_row(self, file: str) -> Optional[Dict[str, object]]:
+        """Return the hash cache row for a scanned folder file, if any"""
+        if self.hash_cache is None:
+            return None
         try:
-            with zipfile.ZipFile(archive_path, 'r') as zip_file:
-                return sum(info.file_size for info in zip_file.filelist)
-        except KeyboardInterrupt:
-            print("\nOperation cancelled by user.")
-            sys.exit(0)
+            return self.hash_cache.get(os.path.abspath(file), self.folder_mtimes[file], self.folder_sizes[file])
+        except sqlite3.Error as e:
+            self.disable_cache(e)
+            return None
+    
+    def cache_crc(self, file: str, crc: int) -> None:
+        """Store a folder file's CRC32 in the hash cache"""
+        if self.hash_cache is None:
+            return
+        try:
+            self.hash_cache.put_crc(os.path.abspath(file), self.folder_mtimes[file], self.folder_sizes[file], crc)
+        except sqlite3.Error as e:
+            self.disable_cache(e)
+    
+    def cache_digest(self, file: str, file_hash: str) -> None:
+        """Store a folder file's content hash in the hash cache"""
+        if self.hash_cache is None:
+            return
+        try:
+            self.hash_cache.put_digest(os.path.abspath(file), self.folder_mtimes[file],
+                                       self.folder_sizes[file], self.hash_algorithm, file_hash)
+        except sqlite3.Error as e:
+            self.disable_cache(e)
+    
+    def commit_cache(self) -> None:
+        """Commit pending hash cache writes"""
+        if self.hash_cache is None:
+            return
+        try:
+            self.hash_cache.commit()
+        except sqlite3.Error as e:
+            self.disable_cache(e)
+    
+    def close_cache(self) -> None:
+        """Commit and close the hash cache"""
+        if self.hash_cache is None:
+            return
+        try:
+            self.hash_cache.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Could not save hash cache: {e}")
+        self.hash_cache = None
+    
+    def disable_cache(self, error: sqlite3.Error) -> None:
+        """Log a hash cache failure and continue the run without the cache"""
+        logging.warning(f"Hash cache unavailable, continuing without it: {error}")
+        try:
+            self.hash_cache.connection.close()
+        except sqlite3.Error:
+            pass
+        self.hash_cache = None
+    
+    def scan_folder(self, folder_path: str) -> None:
+        """Scan folder and calculate hashes for files that could be duplicates.
         
-    def calculate_file_hash(self, file_path: str) -> str:
-        """Calculate SHA256 hash of a file using chunked reading."""
-        sha256_hash = hashlib.sha256()
-        file_size = os.path.getsize(file_path)
-        processed_size = 0
+        Files of different sizes cannot match, so only files whose size also
+        occurs in the archive are read at all; call get_archive_size first.
+        Those get a CRC32, and only files whose (size, CRC32) pair matches an
+        archive member's central directory entry are fully hashed. Sizes come
+        from the directory walk and are kept in folder_sizes, CRCs in
+        folder_crcs.
+        """
+        self.start_time = time.monotonic()
+        self.total_bytes_processed = 0
         
         try:
-            with open(file_path, "rb") as f:
-                self.current_file = str(file_path)
-                for byte_block in iter(lambda: f.read(self.chunk_size), b""):
-                    sha256_hash.update(byte_block)
-                    processed_size += len(byte_block)
-                    self.total_bytes_processed += len(byte_block)
-                    self.update_progress()
-            return sha256_hash.hexdigest()
+            files_by_size: Dict[int, List[str]] = defaultdict(list)
+            for entry in _walk_files(folder_path):
+                try:
+                    stat_result = entry.stat(follow_symlinks=False)
+                except (PermissionError, OSError) as e:
+                    logging.warning(f"Could not access {entry.path}: {e}")
+                    continue
+                files_by_size[stat_result.st_size].append(entry.path)
+                self.folder_sizes[entry.path] = stat_result.st_size
+                self.folder_mtimes[entry.path] = stat_result.st_mtime_ns
+            self.folder_size = sum(self.folder_sizes.values())
+            
+            archive_size_set = set(self.archive_sizes.values())
+            files = []
+            for file_size, paths in files_by_size.items():
+                if file_size in archive_size_set:
+                    files.extend(paths)
+                    self.total_bytes += file_size * len(paths)
+            
+            # Unchanged files reuse what a previous run computed
+            cached_rows = {}
+            for file in files:
+                row = self.cached_row(file)
+                if row is not None:
+                    cached_rows[file] = row
+            
+            # Work runs in worker processes; progress is tracked here in the parent only.
+            # Workers are spawned rather than forked: the pool forks lazily on
+            # submit, after the progress thread is running, and a fork could copy
+            # a lock held by that thread (tqdm's or stderr's) into the child.
+            with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+                self.start_progress()
+                files_to_hash = self.crc_pass(executor, files, cached_rows)
+                self.digest_pass(executor, files_to_hash, cached_rows)
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             sys.exit(0)
+        finally:
+            self.commit_cache()
+            self.stop_progress()
+
+    def crc_pass(self, executor: ProcessPoolExecutor, files: List[str],
+                 cached_rows: Dict[str, Dict[str, object]]) -> List[str]:
+        """Record CRC32s for size-matched folder files and return those worth hashing.
+        
+        A file is worth hashing when its (size, CRC32) pair matches an archive
+        member. CRCs found in cached_rows are used as-is; the rest are computed
+        in the worker pool and written back to the cache.
+        """
+        archive_keys = {(info.file_size, info.CRC) for info in self.archive_members.values()}
+        files_to_hash = []
+        
+        def record(file, crc, file_size):
+            self.current_file = file
+            if crc is not None:
+                self.folder_crcs[file] = crc
+                if (file_size, crc) in archive_keys:
+                    files_to_hash.append(file)
+            self.add_progress(file_size)
+        
+        for file in files:
+            if file in cached_rows:
+                record(file, cached_rows[file]["crc32"], self.folder_sizes[file])
+        
+        files_to_crc = [file for file in files if file not in cached_rows]
+        for file, crc, file_size in executor.map(_crc_file, files_to_crc, chunksize=32):
+            record(file, crc, file_size)
+            if crc is not None:
+                self.cache_crc(file, crc)
+        # Release the write lock before the digest pass, not after 1000 more rows
+        self.commit_cache()
+        
+        return files_to_hash
     
-    def scan_folder(self, folder_path: str) -> None:
-        """Scan folder and calculate hashes for all files."""
-        self.start_time = datetime.now()
-        self.total_bytes_processed = 0
+    def digest_pass(self, executor: ProcessPoolExecutor, files: List[str],
+                    cached_rows: Dict[str, Dict[str, object]]) -> None:
+        """Record content hashes for folder files that survived the CRC pass.
+        
+        Digests for the current algorithm found in cached_rows are used as-is;
+        the rest are computed in the worker pool and written back to the cache.
+        """
+        self.grow_progress_total(sum(self.folder_sizes[file] for file in files))
+        
+        def record(file, file_hash, file_size):
+            self.current_file = file
+            if file_hash is not None:
+                self.folder_files[file] = file_hash
+                self.folder_hashes_by_hash[file_hash].append(file)
+            self.add_progress(file_size)
+        
+        def record_computed(file, file_hash, file_size):
+            record(file, file_hash, file_size)
+            if file_hash is not None:
+                self.cache_digest(file, file_hash)
         
+        pooled_files = []
+        solo_files = []
+        for file in files:
+            cached_hash = cached_rows[file][self.hash_algorithm] if file in cached_rows else None
+            if cached_hash is not None:
+                record(file, cached_hash, self.folder_sizes[file])
+            elif self.hash_algorithm == "blake3" and self.folder_sizes[file] >= SINGLE_SHOT_LIMIT:
+                solo_files.append(file)
+            else:
+                pooled_files.append(file)
+        
+        # Pool workers hash with one thread each so processes x threads stays at the core count
+        for file, file_hash, file_size in executor.map(
+                partial(_hash_file, algorithm=self.hash_algorithm), pooled_files, chunksize=32):
+            record_computed(file, file_hash, file_size)
+        
+        # Large BLAKE3 files are hashed here one at a time, each spread across every core
+        for file in solo_files:
+            record_computed(*_hash_file(file, self.hash_algorithm, AUTO_THREADS))
+        self.commit_cache()
+
+    def find_duplicates(self) -> Tuple[List[Tuple[str, List[str]]], List[str]]:
+        """Split archive members into duplicates and files to extract.
+        
+        Returns a list of (archive member, matching folder paths) pairs and a
+        list of member names with no match in the folder.
+        """
+        duplicates = []
+        unique = []
+        
+        for filename, file_size in self.archive_sizes.items():
+            # Members skipped by the size/CRC prefilter have no hash and match nothing
+            matches = self.folder_hashes_by_hash.get(self.archive_files.get(filename))
+            if matches and self.folder_sizes[matches[0]] == file_size:
+                duplicates.append((filename, matches))
+            else:
+                unique.append(filename)
+        
+        return duplicates, unique
+    
+    def stored_member_view(self, file_info: zipfile.ZipInfo) -> Optional[memoryview]:
+        """Return a zero-copy view of a stored member's bytes in the mapped archive.
+        
+        Returns None for compressed or encrypted members, or if the local
+        header does not look right, so the caller falls back to zipfile.
+        """
+        if (self.archive_map is None or file_info.compress_type != zipfile.ZIP_STORED
+                or file_info.flag_bits & 0x1):
+            return None
+        
+        header_offset = file_info.header_offset
+        if self.archive_map[header_offset:header_offset + 4] != b"PK\x03\x04":
+            return None
+        # Name and extra field lengths sit at the end of the 30-byte local header
+        name_length, extra_length = struct.unpack_from("<HH", self.archive_map, header_offset + 26)
+        data_start = header_offset + 30 + name_length + extra_length
+        data_end = data_start + file_info.file_size
+        if data_end > len(self.archive_map):
+            return None
+        return memoryview(self.archive_map)[data_start:data_end]
+    
+    def hash_archive_member(self, zip_file: zipfile.ZipFile, file_info: zipfile.ZipInfo) -> Tuple[str, str]:
+        """Hash one archive member, reading it from the mapped archive when stored."""
+        self.current_file = file_info.filename
+        # The archive workers are threads of one process and share BLAKE3's
+        # single per-process thread pool, so AUTO does not multiply here
+        hasher = _new_hasher(self.hash_algorithm, file_info.file_size, AUTO_THREADS)
+        stored_view = self.stored_member_view(file_info)
+        if stored_view is not None:
+            # Uncompressed members are hashed in place, with no copy at any size
+            with stored_view:
+                hasher.update(stored_view)
+            self.add_progress(file_info.file_size)
+        elif file_info.file_size < self.member_read_limit:
+            hasher.update(zip_file.read(file_info))
+            self.add_progress(file_info.file_size)
+        else:
+            with zip_file.open(file_info) as f:
+                # Bound methods looked up once; partial avoids a Python frame per read
+                update = hasher.update
+                add_progress = self.add_progress
+                for byte_block in iter(partial(f.read, self.chunk_size), b""):
+                    update(byte_block)
+                    add_progress(len(byte_block))
+        
+        return file_info.filename, hasher.hexdigest()
+    
+    def scan_archive(self, zip_file: zipfile.ZipFile) -> None:
+        """Scan archive and calculate hashes for members that could be duplicates.
+        
+        Only members whose size and central directory CRC32 match a scanned
+        folder file are hashed; every other member is known to be unique
+        without decompressing it.
+        
+        The workers share zip_file, so it should be opened from a file object:
+        zipfile then locks every seek and read on it and never closes it early.
+        """
         try:
-            files = list(pathlib.Path(folder_path).rglob('*'))
-            with ThreadPoolExecutor() as executor:
-                future_to_file = {
-                    executor.submit(self.calculate_file_hash, str(file)): file
-                    for file in files if file.is_file()
-                }
-                
-                for future in future_to_file:
-                    file = future_to_file[future]
-                    try:
-                        self.folder_files[str(file)] = future.result()
-                    except Exception as e:
-                        logging.error(f"Error processing {file}: {e}")
+            with open(zip_file.filename, "rb") as archive_file:
+                self.archive_map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+            
+            self.get_archive_size(zip_file)
+            folder_keys = {(self.folder_sizes[file], crc) for file, crc in self.folder_crcs.items()}
+            members = [
+                info for info in self.archive_members.values()
+                if (info.file_size, info.CRC) in folder_keys
+            ]
+            self.total_bytes += sum(info.file_size for info in members)
+            
+            workers = os.cpu_count() or 1
+            self.member_read_limit = min(SINGLE_SHOT_LIMIT, ARCHIVE_READ_BUDGET // workers)
+            
+            self.start_progress()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for filename, file_hash in executor.map(
+                        lambda info: self.hash_archive_member(zip_file, info), members):
+                    self.archive_files[filename] = file_hash
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             sys.exit(0)
+        finally:
+            if self.archive_map is not None:
+                self.archive_map.close()
+                self.archive_map = None
+            self.stop_progress()
 
-    def scan_archive(self, archive_path: str) -> None:
-        """Scan archive and calculate hashes for all files."""
+    def extract_member(self, zip_file: zipfile.ZipFile, file_info: zipfile.ZipInfo, output_path: str) -> None:
+        """Extract one member; safe to call from several threads on one zip_file."""
+        try:
+            zip_file.extract(file_info, output_path)
+        except FileExistsError:
+            # Another worker created the same parent directory first
+            zip_file.extract(file_info, output_path)
+    
+    def extract_members(self, zip_file: zipfile.ZipFile, members: List[zipfile.ZipInfo], output_path: str) -> None:
+        """Extract members, decompressing and writing several at once when possible."""
         try:
-            with zipfile.ZipFile(archive_path, 'r') as zip_file:
-                for file_info in zip_file.filelist:
-                    if not file_info.is_dir():
-                        self.current_file = file_info.filename
-                        self.update_progress()
-                        
-                        with zip_file.open(file_info) as f:
-                            sha256_hash = hashlib.sha256()
-                            for byte_block in iter(lambda: f.read(self.chunk_size), b""):
-                                sha256_hash.update(byte_block)
-                                self.total_bytes_processed += len(byte_block)
-                                self.update_progress()
-                            
-                        self.archive_files[file_info.filename] = sha256_hash.hexdigest()
+            if len(members) < 2 or (os.cpu_count() or 1) < 2:
+                zip_file.extractall(output_path, members=members)
+                return
+            
+            # zlib and file writes release the GIL, so threads overlap usefully
+            with ThreadPoolExecutor() as executor:
+                list(executor.map(
+                    lambda info: self.extract_member(zip_file, info, output_path), members))
         except KeyboardInterrupt:
             print("\nOperation cancelled by user.")
             sys.exit(0)
 
 def main():
+    parser = argparse.ArgumentParser(
+        description="Extract only the archive members not already present in a folder."
+    )
+    parser.add_argument("--sha256", action="store_true",
+                        help="hash with SHA-256 instead of BLAKE3 (used by default when installed)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help=f"do not read or update the hash cache at {DEFAULT_CACHE_PATH}")
+    args = parser.parse_args()
+    
     # Handle Ctrl+C gracefully
     def signal_handler(sig, frame):
         print("\nOperation cancelled by user.")
@@ -157,7 +669,11 @@ def main():
     # Set up logging
     logging.basicConfig(level=logging.INFO)
     
-    # Create GUI for folder and file selection
+    # Create GUI for folder and file selection. tkinter is imported here, not at
+    # module level, because spawned hash workers re-import this module.
+    import tkinter as tk
+    from tkinter import filedialog
+    
     root = tk.Tk()
     root.withdraw()
     
@@ -187,37 +703,35 @@ def main():
             return
         
         # Initialize comparer
-        comparer = ArchiveComparer()
-        
-        # Calculate total sizes
-        print("\nCalculating total sizes...")
-        comparer.total_bytes = comparer.get_total_folder_size(folder_path)
-        comparer.total_bytes += comparer.get_archive_size(archive_path)
-        
-        # Scan folder and archive
-        print("\nScanning folder...")
-        comparer.scan_folder(folder_path)
-        
-        print("\n\nScanning archive...")
-        comparer.total_bytes_processed = 0  # Reset for archive scanning
-        comparer.start_time = datetime.now()
-        comparer.scan_archive(archive_path)
-        
-        # Compare and extract files
-        print("\n\nComparing files and extracting non-duplicates...")
-        duplicates = []
-        extracted = []
-        
-        # Create reverse lookup for folder hashes
-        folder_hashes = {hash_value: path for path, hash_value in comparer.folder_files.items()}
+        comparer = ArchiveComparer(
+            "sha256" if args.sha256 else DEFAULT_HASH_ALGORITHM,
+            cache_path=None if args.no_cache else DEFAULT_CACHE_PATH
+        )
         
-        with zipfile.ZipFile(archive_path, 'r') as zip_file:
-            for filename, file_hash in comparer.archive_files.items():
-                if file_hash in folder_hashes.keys():
-                    duplicates.append((filename, folder_hashes[file_hash]))
-                else:
-                    zip_file.extract(filename, output_path)
-                    extracted.append(filename)
+        try:
+            # The central directory is parsed once here and reused for every step.
+            # Opening from a file object lets the worker threads share zip_file
+            # safely: its reads are locked and its file is never closed under them.
+            with open(archive_path, "rb") as archive_file, zipfile.ZipFile(archive_file) as zip_file:
+                # Archive member sizes decide which folder files need hashing
+                print("\nReading archive directory...")
+                comparer.get_archive_size(zip_file)
+                
+                # Scan folder and archive
+                print("\nScanning folder...")
+                comparer.scan_folder(folder_path)
+                
+                print("\nScanning archive...")
+                comparer.scan_archive(zip_file)
+                
+                # Compare and extract files
+                print("\nComparing files and extracting non-duplicates...")
+                duplicates, extracted = comparer.find_duplicates()
+                
+                extract_infos = [comparer.archive_members[filename] for filename in extracted]
+                comparer.extract_members(zip_file, extract_infos, output_path)
+        finally:
+            comparer.close_cache()
         
         # Generate report
         print("\n\nDiff Report:")
@@ -225,12 +739,15 @@ def main():
         print(f"\nArchive examined: {archive_path}")
         print(f"Compared against folder: {folder_path}")
         print(f"Files extracted to: {output_path}")
+        print(f"Hash algorithm: {comparer.hash_algorithm.upper()}")
         print("-" * 50)
         
         print(f"\nDuplicate files found ({len(duplicates)}):")
-        for archive_file, folder_file in duplicates:
+        for archive_file, folder_matches in duplicates:
             print(f"Archive: {archive_file}")
-            print(f"Matches: {folder_file}\n")
+            for folder_file in folder_matches:
+                print(f"Matches: {folder_file}")
+            print()
         
         print(f"\nFiles extracted ({len(extracted)}):")
         for file in extracted:
@@ -240,11 +757,12 @@ def main():
         print("\nSummary:")
         print("-" * 50)
         print(f"Archive processed: {os.path.basename(archive_path)}")
-        print(f"Total archive size: {comparer.format_size(comparer.get_archive_size(archive_path))}")
-        print(f"Total folder size scanned: {comparer.format_size(comparer.get_total_folder_size(folder_path))}")
-        print(f"Total files processed: {len(comparer.archive_files)}")
+        print(f"Total archive size: {comparer.format_size(comparer.archive_size)}")
+        print(f"Total folder size scanned: {comparer.format_size(comparer.folder_size)}")
+        print(f"Total files processed: {len(comparer.archive_sizes)}")
         print(f"Total duplicates: {len(duplicates)}")
         print(f"Total files extracted: {len(extracted)}")
+        print(f"Elapsed time: {comparer.format_time(time.monotonic() - comparer.start_time)}")
         
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")